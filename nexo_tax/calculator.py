@@ -1,6 +1,9 @@
+from bisect import bisect_left
 from collections import deque
-from datetime import datetime
+from datetime import MAXYEAR, MINYEAR, datetime
 from decimal import Decimal
+from operator import attrgetter
+from typing import TypeVar
 
 from nexo_tax.models import (
     AnnualSummary,
@@ -16,6 +19,26 @@ from nexo_tax.models import (
     RepaymentEvent,
 )
 
+# TypeVar rather than PEP 695 syntax: the web build runs on Pyodide's Python 3.11
+_E = TypeVar("_E")
+_event_date = attrgetter("date")
+_acquired_date = attrgetter("acquired_date")
+
+
+def year_slice(events: list[_E], year: int) -> list[_E]:  # noqa: UP047
+    """Return the events dated within ``year`` from a date-sorted list.
+
+    Locates the year boundaries with bisect instead of scanning every event.
+    Years outside the range datetime supports simply have no events.
+    """
+    if not MINYEAR <= year <= MAXYEAR:
+        return []
+    lo = bisect_left(events, datetime(year, 1, 1), key=_event_date)
+    if year == MAXYEAR:
+        return events[lo:]  # no datetime(MAXYEAR + 1, 1, 1) upper bound
+    hi = bisect_left(events, datetime(year + 1, 1, 1), lo=lo, key=_event_date)
+    return events[lo:hi]
+
 
 def build_lot_queue(
     cashback_events: list[CashbackEvent],
@@ -65,12 +88,13 @@ def build_lot_queue(
         )
 
     for asset_lots in lots_by_asset.values():
-        asset_lots.sort(key=lambda lot: lot.acquired_date)
+        asset_lots.sort(key=_acquired_date)
 
     return {asset: deque(lots) for asset, lots in lots_by_asset.items()}
 
 
 _DUST_THRESHOLD = Decimal("1E-8")
+_ZERO = Decimal("0")
 
 
 def process_disposal(
@@ -79,17 +103,23 @@ def process_disposal(
     """Process a single disposal against the per-asset FIFO lot queue.
 
     Consumes lots front-to-back, popping fully exhausted lots so each lot
-    is visited at most once across all disposals.
+    is visited at most once across all disposals. A lot consumed whole in a
+    single step contributes its cost directly, skipping the pro-rata division.
     """
-    lots = lots_by_asset.get(disposal.asset, deque())
+    lots = lots_by_asset.get(disposal.asset)
+    if lots is None:
+        lots = deque()
     qty_needed = disposal.quantity
-    total_cost = Decimal("0")
+    total_cost = _ZERO
     lots_consumed: list[tuple[str, Decimal, Decimal, datetime]] = []
 
     while lots and qty_needed > 0:
         lot = lots[0]
         used = min(lot.remaining, qty_needed)
-        cost_from_lot = lot.cost_eur * (used / lot.quantity)
+        if used == lot.quantity:
+            cost_from_lot = lot.cost_eur
+        else:
+            cost_from_lot = lot.cost_eur * (used / lot.quantity)
         total_cost += cost_from_lot
         lot.remaining -= used
         qty_needed -= used
@@ -123,61 +153,60 @@ def compute_annual_summary(
     disposal_events: list[DisposalEvent],
     lots_by_asset: dict[str, deque[Lot]],
 ) -> AnnualSummary:
-    """Compute annual tax summary for the given year."""
-    year_cashback = [ev for ev in cashback_events if ev.date.year == year]
-    year_reversals = [ev for ev in cashback_reversal_events if ev.date.year == year]
-    year_interest = [ev for ev in interest_events if ev.date.year == year]
-    year_exchange_buys = [ev for ev in exchange_buy_events if ev.date.year == year]
-    year_disposals = [ev for ev in disposal_events if ev.date.year == year]
-
-    total_cashback_nexo = sum(
-        (ev.amount_nexo for ev in year_cashback), Decimal("0")
-    )
-    total_cashback_eur = sum(
-        (ev.value_eur for ev in year_cashback), Decimal("0")
-    )
-    total_cashback_reversal_eur = sum(
-        (ev.value_eur for ev in year_reversals), Decimal("0")
-    )
+    """Compute annual tax summary for the given year.
+
+    Event lists must be sorted by date (as returned by the parser). Each
+    year's events are located by bisect and walked once to accumulate totals.
+    """
+    year_cashback = year_slice(cashback_events, year)
+    year_reversals = year_slice(cashback_reversal_events, year)
+    year_interest = year_slice(interest_events, year)
+    year_exchange_buys = year_slice(exchange_buy_events, year)
+    year_disposals = year_slice(disposal_events, year)
+
+    total_cashback_nexo = _ZERO
+    total_cashback_eur = _ZERO
+    for ev in year_cashback:
+        total_cashback_nexo += ev.amount_nexo
+        total_cashback_eur += ev.value_eur
+
+    total_cashback_reversal_eur = _ZERO
+    for ev in year_reversals:
+        total_cashback_reversal_eur += ev.value_eur
 
     total_interest_by_asset: dict[str, Decimal] = {}
+    total_interest_eur = _ZERO
     for ev in year_interest:
         total_interest_by_asset[ev.asset] = (
-            total_interest_by_asset.get(ev.asset, Decimal("0")) + ev.amount
+            total_interest_by_asset.get(ev.asset, _ZERO) + ev.amount
         )
-    total_interest_eur = sum(
-        (ev.value_eur for ev in year_interest), Decimal("0")
-    )
+        total_interest_eur += ev.value_eur
 
     total_exchange_buy_by_asset: dict[str, Decimal] = {}
+    total_exchange_buy_eur = _ZERO
     for ev in year_exchange_buys:
         total_exchange_buy_by_asset[ev.asset] = (
-            total_exchange_buy_by_asset.get(ev.asset, Decimal("0")) + ev.amount
+            total_exchange_buy_by_asset.get(ev.asset, _ZERO) + ev.amount
         )
-    total_exchange_buy_eur = sum(
-        (ev.value_eur for ev in year_exchange_buys), Decimal("0")
-    )
+        total_exchange_buy_eur += ev.value_eur
 
     disposal_results = [process_disposal(lots_by_asset, d) for d in year_disposals]
 
-    total_proceeds = sum(
-        (r.disposal.proceeds_eur - r.disposal.fee_eur for r in disposal_results),
-        Decimal("0"),
-    )
-    total_cost_basis = sum(
-        (r.cost_basis_eur for r in disposal_results), Decimal("0")
-    )
-    total_gain = sum((r.gain_eur for r in disposal_results), Decimal("0"))
+    total_proceeds = _ZERO
+    total_cost_basis = _ZERO
+    total_gain = _ZERO
+    for r in disposal_results:
+        total_proceeds += r.disposal.proceeds_eur - r.disposal.fee_eur
+        total_cost_basis += r.cost_basis_eur
+        total_gain += r.gain_eur
 
     remaining_by_asset: dict[str, Decimal] = {}
     remaining_lots = 0
     for asset, lots in lots_by_asset.items():
-        for lot in lots:
-            if lot.remaining > 0:
-                remaining_lots += 1
-                remaining_by_asset[asset] = (
-                    remaining_by_asset.get(asset, Decimal("0")) + lot.remaining
-                )
+        held = [lot.remaining for lot in lots if lot.remaining > 0]
+        if held:
+            remaining_lots += len(held)
+            remaining_by_asset[asset] = sum(held, _ZERO)
 
     return AnnualSummary(
         year=year,
@@ -212,23 +241,23 @@ def compute_card_analysis(
 ) -> CardAnalysisSummary:
     """Compute credit card cashback profitability analysis for a year.
 
-    Calculates FX spread cost, cashback tax, and effective cashback rate.
+    Event lists must be sorted by date. Calculates FX spread cost, cashback
+    tax, and effective cashback rate.
     """
-    year_purchases = [ev for ev in card_purchases if ev.date.year == year]
-    year_repayments = [ev for ev in repayments if ev.date.year == year]
+    year_purchases = year_slice(card_purchases, year)
+    year_repayments = year_slice(repayments, year)
 
-    total_purchase_eur = sum(
-        (ev.eur_amount for ev in year_purchases), Decimal("0")
-    )
-    total_purchase_usd = sum(
-        (ev.usd_amount for ev in year_purchases), Decimal("0")
-    )
-    total_repayment_eur = sum(
-        (ev.eur_amount for ev in year_repayments), Decimal("0")
-    )
-    total_repayment_usd = sum(
-        (ev.usd_amount for ev in year_repayments), Decimal("0")
-    )
+    total_purchase_eur = _ZERO
+    total_purchase_usd = _ZERO
+    for ev in year_purchases:
+        total_purchase_eur += ev.eur_amount
+        total_purchase_usd += ev.usd_amount
+
+    total_repayment_eur = _ZERO
+    total_repayment_usd = _ZERO
+    for ev in year_repayments:
+        total_repayment_eur += ev.eur_amount
+        total_repayment_usd += ev.usd_amount
 
     # FX spread: adjust for USD mismatch between purchases and repayments
     if total_purchase_usd > 0:
@@ -237,7 +266,7 @@ def compute_card_analysis(
         mismatch_eur = usd_mismatch * purchase_rate
         fx_spread_eur = total_repayment_eur - (total_purchase_eur - mismatch_eur)
     else:
-        fx_spread_eur = Decimal("0")
+        fx_spread_eur = _ZERO
 
     cashback_tax_eur = net_cashback_eur * _TAX_RATE
     net_benefit_eur = net_cashback_eur - cashback_tax_eur - fx_spread_eur
@@ -245,7 +274,7 @@ def compute_card_analysis(
     if total_purchase_eur > 0:
         effective_rate_pct = net_benefit_eur / total_purchase_eur * 100
     else:
-        effective_rate_pct = Decimal("0")
+        effective_rate_pct = _ZERO
 
     return CardAnalysisSummary(
         year=year,
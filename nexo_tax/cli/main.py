@@ -2,8 +2,10 @@ import argparse
 import logging
 import sys
 from pathlib import Path
+from typing import IO
 
 from nexo_tax.api import run as run_calculation
+from nexo_tax.report import AUDIT_BUFFER_SIZE
 
 logger = logging.getLogger(__name__)
 
@@ -35,25 +37,45 @@ def main() -> None:
         with open(csv_file, encoding="utf-8") as f:
             csv_contents.append(f.read())
 
+    # Audit files are streamed to temporary names and only renamed into place
+    # once every year has been computed, so a failed run never mixes new audit
+    # files with stale ones from an earlier run
+    output_dir = Path("output")
+    # Final path -> temporary path; a repeated --year reopens the same file
+    written: dict[Path, Path] = {}
+
+    def open_audit_file(filename: str) -> IO[str]:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        filepath = output_dir / filename
+        tmp_path = filepath.with_name(filepath.name + ".tmp")
+        written[filepath] = tmp_path
+        return open(
+            tmp_path, "w", newline="", encoding="utf-8", buffering=AUDIT_BUFFER_SIZE
+        )
+
     # Run calculation via API (includes CSV schema validation)
+    succeeded = False
     try:
-        result = run_calculation(csv_contents, args.year, args.audit_csv)
+        result = run_calculation(
+            csv_contents, args.year, args.audit_csv, sink=open_audit_file
+        )
+        succeeded = True
     except ValueError as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        if not succeeded:
+            for tmp_path in written.values():
+                tmp_path.unlink(missing_ok=True)
+
+    for filepath, tmp_path in written.items():
+        tmp_path.replace(filepath)
 
     # Print console output
     print(result["console"], end="")
 
-    # Write audit files if requested
-    if args.audit_csv:
-        output_dir = Path("output")
-        output_dir.mkdir(parents=True, exist_ok=True)
-        for filename, content in result["audit_files"].items():
-            filepath = output_dir / filename
-            with open(filepath, "w", newline="") as f:
-                f.write(content)
-            logger.info("  Wrote %s", filepath)
+    for filepath in written:
+        logger.info("  Wrote %s", filepath)
 
 
 if __name__ == "__main__":
@@ -4,6 +4,8 @@ from decimal import Decimal
 
 from nexo_tax.parser import FxObservation
 
+_NO_TOTALS = (Decimal("0"), Decimal("0"))
+
 
 def build_daily_rates(observations: list[FxObservation]) -> dict[date, Decimal]:
     """Build daily USD/EUR rates from card purchase observations.
@@ -13,10 +15,10 @@ def build_daily_rates(observations: list[FxObservation]) -> dict[date, Decimal]:
     """
     daily_totals: dict[date, tuple[Decimal, Decimal]] = {}  # date -> (eur, usd)
 
-    for obs in observations:
-        day = obs.date.date()
-        eur, usd = daily_totals.get(day, (Decimal("0"), Decimal("0")))
-        daily_totals[day] = (eur + obs.eur_amount, usd + obs.usd_amount)
+    for dt, obs_eur, obs_usd in observations:
+        day = dt.date()
+        eur, usd = daily_totals.get(day, _NO_TOTALS)
+        daily_totals[day] = (eur + obs_eur, usd + obs_usd)
 
     return {day: eur / usd for day, (eur, usd) in daily_totals.items()}
 
@@ -27,6 +29,10 @@ class FxRateTable:
     def __init__(self, observations: list[FxObservation]) -> None:
         self._rates = build_daily_rates(observations)
         self._sorted_dates = sorted(self._rates.keys())
+        # Rates in date order, parallel to _sorted_dates, for index lookups
+        self._sorted_rates = [self._rates[day] for day in self._sorted_dates]
+        # Nearest-date fallbacks already resolved, keyed by day
+        self._nearest: dict[date, Decimal] = {}
 
     def rate_for_date(self, dt: datetime) -> Decimal:
         """Return USD/EUR rate for the given datetime.
@@ -38,25 +44,79 @@ class FxRateTable:
             return self._rates[day]
         return self._nearest_rate(day)
 
-    def _nearest_rate(self, day: date) -> Decimal:
-        """Find rate from the nearest date using bisect."""
-        if not self._sorted_dates:
-            raise ValueError("No FX observations available")
+    def rates_for_dates(self, dts: list[datetime]) -> list[Decimal]:
+        """Return USD/EUR rates for many datetimes at once.
 
-        idx = bisect_left(self._sorted_dates, day)
+        Same result as calling rate_for_date per datetime, but walks a cursor
+        through the observation dates instead of bisecting for every lookup,
+        so date-sorted input costs amortized O(1) per datetime.
+        """
+        rates = self._rates
+        sorted_dates = self._sorted_dates
+        n = len(sorted_dates)
+        out: list[Decimal] = []
+        idx = 0
+        # Day the cursor was last positioned for; exact hits leave it alone
+        cursor_day: date | None = None
+        for dt in dts:
+            day = dt.date()
+            rate = rates.get(day)
+            if rate is None:
+                if not sorted_dates:
+                    raise ValueError("No FX observations available")
+                if cursor_day is not None and day < cursor_day:
+                    idx = bisect_left(sorted_dates, day)
+                while idx < n and sorted_dates[idx] < day:
+                    idx += 1
+                rate = self._rate_near(idx, day)
+                cursor_day = day
+            out.append(rate)
+        return out
 
+    def _nearest_rate(self, day: date) -> Decimal:
+        """Find rate from the nearest date using bisect, memoized per day."""
+        rate = self._nearest.get(day)
+        if rate is None:
+            if not self._sorted_dates:
+                raise ValueError("No FX observations available")
+            rate = self._rate_near(bisect_left(self._sorted_dates, day), day)
+            self._nearest[day] = rate
+        return rate
+
+    def _rate_near(self, idx: int, day: date) -> Decimal:
+        """Pick the rate of the observation date nearest to ``day``.
+
+        ``idx`` is the bisect_left insertion point of ``day``; ties go to the
+        earlier date.
+        """
         if idx == 0:
-            return self._rates[self._sorted_dates[0]]
+            return self._sorted_rates[0]
         if idx >= len(self._sorted_dates):
-            return self._rates[self._sorted_dates[-1]]
+            return self._sorted_rates[-1]
 
         before = self._sorted_dates[idx - 1]
         after = self._sorted_dates[idx]
         if (day - before) <= (after - day):
-            return self._rates[before]
-        return self._rates[after]
+            return self._sorted_rates[idx - 1]
+        return self._sorted_rates[idx]
 
     def convert_usd_to_eur(self, usd_amount: Decimal, dt: datetime) -> Decimal:
         """Convert a USD amount to EUR using the rate for the given date."""
         rate = self.rate_for_date(dt)
         return usd_amount * rate
+
+
+def apply_eur_values(
+    fx: FxRateTable,
+    events: list,
+    usd_attr: str = "value_usd",
+    eur_attr: str = "value_eur",
+) -> None:
+    """Set each event's EUR field from its USD field at the event date's rate.
+
+    Rates for the whole list are looked up in one batch, so a date-sorted
+    list costs a single walk through the observation dates.
+    """
+    rates = fx.rates_for_dates([ev.date for ev in events])
+    for ev, rate in zip(events, rates, strict=True):
+        setattr(ev, eur_attr, getattr(ev, usd_attr) * rate)
@@ -3,7 +3,7 @@ from datetime import datetime
 from decimal import Decimal
 
 
-@dataclass
+@dataclass(slots=True)
 class CashbackEvent:
     tx_id: str
     date: datetime
@@ -13,7 +13,7 @@ class CashbackEvent:
     merchant: str
 
 
-@dataclass
+@dataclass(slots=True)
 class CashbackReversalEvent:
     """Reversal of a previous cashback when a card purchase is refunded."""
 
@@ -23,7 +23,7 @@ class CashbackReversalEvent:
     value_eur: Decimal
 
 
-@dataclass
+@dataclass(slots=True)
 class InterestEvent:
     tx_id: str
     date: datetime
@@ -34,7 +34,7 @@ class InterestEvent:
     source: str  # "Interest", "Fixed Term Interest", "Exchange Cashback"
 
 
-@dataclass
+@dataclass(slots=True)
 class ExchangeBuyEvent:
     """Crypto purchased via Exchange (e.g. EURX → NEXO, EUR → BTC)."""
 
@@ -48,7 +48,7 @@ class ExchangeBuyEvent:
     value_eur: Decimal
 
 
-@dataclass
+@dataclass(slots=True)
 class Lot:
     asset: str
     acquired_date: datetime
@@ -59,7 +59,7 @@ class Lot:
     source: str = "cashback"  # "cashback", "interest", "exchange_buy"
 
 
-@dataclass
+@dataclass(slots=True)
 class DisposalEvent:
     tx_id: str
     date: datetime
@@ -71,7 +71,7 @@ class DisposalEvent:
     description: str
 
 
-@dataclass
+@dataclass(slots=True)
 class DisposalResult:
     disposal: DisposalEvent
     cost_basis_eur: Decimal
@@ -79,7 +79,7 @@ class DisposalResult:
     lots_consumed: list[tuple[str, Decimal, Decimal, datetime]]  # (tx_id, qty_used, cost_eur, acquired_date)
 
 
-@dataclass
+@dataclass(slots=True)
 class RepaymentEvent:
     """Exchange Liquidation: EURX → USDX to repay credit line."""
 
@@ -89,7 +89,7 @@ class RepaymentEvent:
     usd_amount: Decimal  # USDX output amount
 
 
-@dataclass
+@dataclass(slots=True)
 class CardPurchaseEvent:
     """Nexo Card Purchase: USDX → EUR at point of sale."""
 
@@ -1,8 +1,14 @@
 import csv
+import heapq
+import io
+from collections.abc import Callable, Iterable
 from dataclasses import dataclass
 from datetime import datetime
 from decimal import Decimal
+from operator import attrgetter
 from pathlib import Path
+from sys import intern
+from typing import IO, NamedTuple
 
 from nexo_tax.models import (
     CardPurchaseEvent,
@@ -15,14 +21,15 @@ from nexo_tax.models import (
 )
 
 
-@dataclass
-class FxObservation:
+class FxObservation(NamedTuple):
+    """One card purchase's EUR and USD amounts, used to derive FX rates."""
+
     date: datetime
     eur_amount: Decimal
     usd_amount: Decimal
 
 
-@dataclass
+@dataclass(slots=True)
 class ParseResult:
     cashback_events: list[CashbackEvent]
     cashback_reversal_events: list[CashbackReversalEvent]
@@ -34,9 +41,21 @@ class ParseResult:
     repayment_events: list[RepaymentEvent]
 
 
-_INTEREST_TYPES = {"Interest", "Fixed Term Interest", "Exchange Cashback"}
-_USD_CURRENCIES = {"USD", "xUSD", "USDX"}
-_FIAT_CURRENCIES = {"EUR", "EURX", "USD", "xUSD", "USDX"}
+_by_date = attrgetter("date")
+
+# Placeholder EUR amounts, filled in once the FX table is built. Decimals are
+# immutable, so every event can share one instance.
+_ZERO = Decimal("0")
+
+# Row handlers intern the currency codes, types and merchant names they store,
+# so recurring values share one string and membership tests here usually
+# match on identity.
+_INTEREST_TYPES = frozenset({"Interest", "Fixed Term Interest", "Exchange Cashback"})
+_EXCHANGE_TYPES = frozenset({"Exchange", "Exchange Collateral"})
+_SELL_TYPES = frozenset({"Manual Sell Order", "Withdrawal"})
+_EUR_CURRENCIES = frozenset({"EUR", "EURX"})
+_USD_CURRENCIES = frozenset({"USD", "xUSD", "USDX"})
+_FIAT_CURRENCIES = _EUR_CURRENCIES | _USD_CURRENCIES
 
 
 def _is_crypto(currency: str) -> bool:
@@ -51,14 +70,284 @@ def _parse_usd(val: str) -> Decimal:
 
 def _extract_merchant(details: str) -> str:
     """Extract merchant name from Details field, stripping 'approved / ' prefix."""
-    prefix = "approved / "
-    if details.startswith(prefix):
-        return details[len(prefix) :]
-    return details
+    return details.removeprefix("approved / ")
+
+
+def _parse_date(value: str) -> datetime:
+    """Parse a 'YYYY-MM-DD HH:MM:SS' timestamp exactly as strptime would.
+
+    Zero-padded values in the export's fixed layout go through the C
+    ``fromisoformat`` parser; anything else (unpadded fields, out-of-range
+    values, other layouts) falls back to strptime for its result or error.
+    """
+    if (
+        len(value) == 19
+        and value[4] == "-"
+        and value[7] == "-"
+        and value[10] == " "
+        and value[13] == ":"
+        and value[16] == ":"
+    ):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+
+
+def merge_parse_results(results: list[ParseResult]) -> ParseResult:
+    """Merge per-file results into one, keeping every event list date-sorted.
+
+    Each input list is already sorted by date, so a k-way merge replaces
+    re-sorting the concatenation. Ties keep file order, as a stable sort would.
+    """
+
+    def merged(name: str) -> list:
+        return list(heapq.merge(*(getattr(r, name) for r in results), key=_by_date))
+
+    return ParseResult(
+        cashback_events=merged("cashback_events"),
+        cashback_reversal_events=merged("cashback_reversal_events"),
+        interest_events=merged("interest_events"),
+        exchange_buy_events=merged("exchange_buy_events"),
+        fx_observations=merged("fx_observations"),
+        disposal_events=merged("disposal_events"),
+        card_purchase_events=merged("card_purchase_events"),
+        repayment_events=merged("repayment_events"),
+    )
+
+
+def parse_csvs(paths: list[Path] | list[IO[str]]) -> ParseResult:
+    return merge_parse_results([parse_csv(path) for path in paths])
+
+
+class _Columns(NamedTuple):
+    """Row positions of the export columns the parser reads."""
+
+    tx_type: int
+    tx_id: int
+    date: int
+    input_currency: int
+    input_amount: int
+    output_currency: int
+    output_amount: int
+    usd: int
+    details: int
+
+
+# Header names of the parsed columns, in _Columns field order
+_COLUMN_NAMES = (
+    "Type",
+    "Transaction",
+    "Date / Time (UTC)",
+    "Input Currency",
+    "Input Amount",
+    "Output Currency",
+    "Output Amount",
+    "USD Equivalent",
+    "Details",
+)
+
+
+def _header_columns(header: list[str]) -> _Columns:
+    """Locate the parsed columns in a CSV header row.
+
+    Raises:
+        ValueError: If the header lacks any of the parsed columns.
+    """
+    index = {name: i for i, name in enumerate(header)}
+    missing = [name for name in _COLUMN_NAMES if name not in index]
+    if missing:
+        raise ValueError(f"CSV is missing required columns: {', '.join(missing)}.")
+    return _Columns(*(index[name] for name in _COLUMN_NAMES))
+
+
+def _handle_cashback(row: list[str], col: _Columns, result: ParseResult) -> None:
+    if row[col.input_currency] != "NEXO":
+        return
+    result.cashback_events.append(
+        CashbackEvent(
+            tx_id=row[col.tx_id],
+            date=_parse_date(row[col.date]),
+            amount_nexo=Decimal(row[col.input_amount]),
+            value_usd=_parse_usd(row[col.usd]),
+            value_eur=_ZERO,
+            merchant=intern(_extract_merchant(row[col.details])),
+        )
+    )
+
+
+def _handle_interest(row: list[str], col: _Columns, result: ParseResult) -> None:
+    input_currency = intern(row[col.input_currency])
+    input_amount = Decimal(row[col.input_amount])
+    if input_amount <= 0 or not _is_crypto(input_currency):
+        return
+    result.interest_events.append(
+        InterestEvent(
+            tx_id=row[col.tx_id],
+            date=_parse_date(row[col.date]),
+            asset=input_currency,
+            amount=input_amount,
+            value_usd=_parse_usd(row[col.usd]),
+            value_eur=_ZERO,
+            source=intern(row[col.tx_type]),
+        )
+    )
 
 
-def parse_csvs(paths: list[Path]) -> ParseResult:
-    merged = ParseResult(
+def _handle_cashback_reversal(
+    row: list[str], col: _Columns, result: ParseResult
+) -> None:
+    result.cashback_reversal_events.append(
+        CashbackReversalEvent(
+            tx_id=row[col.tx_id],
+            date=_parse_date(row[col.date]),
+            value_usd=_parse_usd(row[col.usd]),
+            value_eur=_ZERO,
+        )
+    )
+
+
+def _handle_exchange(row: list[str], col: _Columns, result: ParseResult) -> None:
+    input_currency = intern(row[col.input_currency])
+    output_currency = intern(row[col.output_currency])
+    sells_crypto = _is_crypto(input_currency)
+    buys_crypto = _is_crypto(output_currency)
+    if not (sells_crypto or buys_crypto):
+        return
+    tx_id = row[col.tx_id]
+    date = _parse_date(row[col.date])
+    input_amount = Decimal(row[col.input_amount])
+    value_usd = _parse_usd(row[col.usd])
+
+    # Selling crypto → disposal
+    if sells_crypto:
+        result.disposal_events.append(
+            DisposalEvent(
+                tx_id=tx_id,
+                date=date,
+                asset=input_currency,
+                quantity=abs(input_amount),
+                proceeds_usd=value_usd,
+                proceeds_eur=_ZERO,
+                fee_eur=_ZERO,
+                description=intern(_extract_merchant(row[col.details])),
+            )
+        )
+    # Buying crypto → exchange buy
+    if buys_crypto:
+        result.exchange_buy_events.append(
+            ExchangeBuyEvent(
+                tx_id=tx_id,
+                date=date,
+                asset=output_currency,
+                amount=Decimal(row[col.output_amount]),
+                spent_amount=abs(input_amount),
+                spent_currency=input_currency,
+                value_usd=value_usd,
+                value_eur=_ZERO,
+            )
+        )
+
+
+def _handle_sell(row: list[str], col: _Columns, result: ParseResult) -> None:
+    input_currency = intern(row[col.input_currency])
+    if not _is_crypto(input_currency):
+        return
+    result.disposal_events.append(
+        DisposalEvent(
+            tx_id=row[col.tx_id],
+            date=_parse_date(row[col.date]),
+            asset=input_currency,
+            quantity=abs(Decimal(row[col.input_amount])),
+            proceeds_usd=_parse_usd(row[col.usd]),
+            proceeds_eur=_ZERO,
+            fee_eur=_ZERO,
+            description=intern(_extract_merchant(row[col.details])),
+        )
+    )
+
+
+def _handle_top_up(row: list[str], col: _Columns, result: ParseResult) -> None:
+    input_currency = intern(row[col.input_currency])
+    if not _is_crypto(input_currency):
+        return
+    input_amount = Decimal(row[col.input_amount])
+    result.exchange_buy_events.append(
+        ExchangeBuyEvent(
+            tx_id=row[col.tx_id],
+            date=_parse_date(row[col.date]),
+            asset=input_currency,
+            amount=input_amount,
+            spent_amount=input_amount,
+            spent_currency=input_currency,
+            value_usd=_parse_usd(row[col.usd]),
+            value_eur=_ZERO,
+        )
+    )
+
+
+def _handle_card_purchase(
+    row: list[str], col: _Columns, result: ParseResult
+) -> None:
+    if (
+        row[col.input_currency] not in _USD_CURRENCIES
+        or row[col.output_currency] != "EUR"
+    ):
+        return
+    date = _parse_date(row[col.date])
+    usd_amount = abs(Decimal(row[col.input_amount]))
+    eur_amount = Decimal(row[col.output_amount])
+    result.fx_observations.append(
+        FxObservation(date=date, eur_amount=eur_amount, usd_amount=usd_amount)
+    )
+    result.card_purchase_events.append(
+        CardPurchaseEvent(
+            tx_id=row[col.tx_id],
+            date=date,
+            eur_amount=eur_amount,
+            usd_amount=usd_amount,
+            merchant=intern(_extract_merchant(row[col.details])),
+        )
+    )
+
+
+def _handle_liquidation(row: list[str], col: _Columns, result: ParseResult) -> None:
+    if (
+        row[col.input_currency] not in _EUR_CURRENCIES
+        or row[col.output_currency] not in _USD_CURRENCIES
+    ):
+        return
+    result.repayment_events.append(
+        RepaymentEvent(
+            tx_id=row[col.tx_id],
+            date=_parse_date(row[col.date]),
+            eur_amount=abs(Decimal(row[col.input_amount])),
+            usd_amount=Decimal(row[col.output_amount]),
+        )
+    )
+
+
+# Transaction type → row handler. Types not listed here are ignored.
+_ROW_HANDLERS: dict[str, Callable[[list[str], _Columns, ParseResult], None]] = {
+    "Cashback": _handle_cashback,
+    **dict.fromkeys(_INTEREST_TYPES, _handle_interest),
+    "Nexo Card Cashback Reversal": _handle_cashback_reversal,
+    **dict.fromkeys(_EXCHANGE_TYPES, _handle_exchange),
+    **dict.fromkeys(_SELL_TYPES, _handle_sell),
+    "Top up Crypto": _handle_top_up,
+    "Nexo Card Purchase": _handle_card_purchase,
+    "Exchange Liquidation": _handle_liquidation,
+}
+
+
+def _parse_rows(lines: Iterable[str]) -> ParseResult:
+    """Classify the transactions of a Nexo CSV export given as text lines.
+
+    Each row is routed by its ``Type`` through ``_ROW_HANDLERS``; only the
+    handler for that type reads and converts the row's fields.
+    """
+    result = ParseResult(
         cashback_events=[],
         cashback_reversal_events=[],
         interest_events=[],
@@ -69,199 +358,45 @@ def parse_csvs(paths: list[Path]) -> ParseResult:
         repayment_events=[],
     )
 
-    for path in paths:
-        result = parse_csv(path)
-        merged.cashback_events.extend(result.cashback_events)
-        merged.cashback_reversal_events.extend(result.cashback_reversal_events)
-        merged.interest_events.extend(result.interest_events)
-        merged.exchange_buy_events.extend(result.exchange_buy_events)
-        merged.fx_observations.extend(result.fx_observations)
-        merged.disposal_events.extend(result.disposal_events)
-        merged.card_purchase_events.extend(result.card_purchase_events)
-        merged.repayment_events.extend(result.repayment_events)
-
-    merged.cashback_events.sort(key=lambda event: event.date)
-    merged.cashback_reversal_events.sort(key=lambda event: event.date)
-    merged.interest_events.sort(key=lambda event: event.date)
-    merged.exchange_buy_events.sort(key=lambda event: event.date)
-    merged.fx_observations.sort(key=lambda observation: observation.date)
-    merged.disposal_events.sort(key=lambda event: event.date)
-    merged.card_purchase_events.sort(key=lambda event: event.date)
-    merged.repayment_events.sort(key=lambda event: event.date)
-
-    return merged
-
-
-def parse_csv(path: Path) -> ParseResult:
-    """Parse Nexo CSV export and classify transactions."""
-    cashback_events: list[CashbackEvent] = []
-    cashback_reversal_events: list[CashbackReversalEvent] = []
-    interest_events: list[InterestEvent] = []
-    exchange_buy_events: list[ExchangeBuyEvent] = []
-    fx_observations: list[FxObservation] = []
-    disposal_events: list[DisposalEvent] = []
-    card_purchase_events: list[CardPurchaseEvent] = []
-    repayment_events: list[RepaymentEvent] = []
-
-    with open(path, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            tx_type = row["Type"]
-            tx_id = row["Transaction"]
-            date = datetime.strptime(row["Date / Time (UTC)"], "%Y-%m-%d %H:%M:%S")
-            input_currency = row["Input Currency"]
-            input_amount = Decimal(row["Input Amount"])
-            output_currency = row["Output Currency"]
-            value_usd = _parse_usd(row["USD Equivalent"])
-            merchant = _extract_merchant(row["Details"])
-
-            if tx_type == "Cashback" and input_currency == "NEXO":
-                cashback_events.append(
-                    CashbackEvent(
-                        tx_id=tx_id,
-                        date=date,
-                        amount_nexo=input_amount,
-                        value_usd=value_usd,
-                        value_eur=Decimal("0"),
-                        merchant=merchant,
-                    )
-                )
-            elif (
-                tx_type in _INTEREST_TYPES
-                and input_amount > 0
-                and _is_crypto(input_currency)
-            ):
-                interest_events.append(
-                    InterestEvent(
-                        tx_id=tx_id,
-                        date=date,
-                        asset=input_currency,
-                        amount=input_amount,
-                        value_usd=value_usd,
-                        value_eur=Decimal("0"),
-                        source=tx_type,
-                    )
-                )
-            elif tx_type == "Nexo Card Cashback Reversal":
-                cashback_reversal_events.append(
-                    CashbackReversalEvent(
-                        tx_id=tx_id,
-                        date=date,
-                        value_usd=value_usd,
-                        value_eur=Decimal("0"),
-                    )
-                )
-            elif tx_type in {"Exchange", "Exchange Collateral"}:
-                # Selling crypto → disposal
-                if _is_crypto(input_currency):
-                    disposal_events.append(
-                        DisposalEvent(
-                            tx_id=tx_id,
-                            date=date,
-                            asset=input_currency,
-                            quantity=abs(input_amount),
-                            proceeds_usd=value_usd,
-                            proceeds_eur=Decimal("0"),
-                            fee_eur=Decimal("0"),
-                            description=merchant,
-                        )
-                    )
-                # Buying crypto → exchange buy
-                if _is_crypto(output_currency):
-                    output_amount = Decimal(row["Output Amount"])
-                    exchange_buy_events.append(
-                        ExchangeBuyEvent(
-                            tx_id=tx_id,
-                            date=date,
-                            asset=output_currency,
-                            amount=output_amount,
-                            spent_amount=abs(input_amount),
-                            spent_currency=input_currency,
-                            value_usd=value_usd,
-                            value_eur=Decimal("0"),
-                        )
-                    )
-            elif (
-                tx_type in {"Manual Sell Order", "Withdrawal"}
-                and _is_crypto(input_currency)
-            ):
-                disposal_events.append(
-                    DisposalEvent(
-                        tx_id=tx_id,
-                        date=date,
-                        asset=input_currency,
-                        quantity=abs(input_amount),
-                        proceeds_usd=value_usd,
-                        proceeds_eur=Decimal("0"),
-                        fee_eur=Decimal("0"),
-                        description=merchant,
-                    )
-                )
-            elif tx_type == "Top up Crypto" and _is_crypto(input_currency):
-                exchange_buy_events.append(
-                    ExchangeBuyEvent(
-                        tx_id=tx_id,
-                        date=date,
-                        asset=input_currency,
-                        amount=input_amount,
-                        spent_amount=input_amount,
-                        spent_currency=input_currency,
-                        value_usd=value_usd,
-                        value_eur=Decimal("0"),
-                    )
-                )
-            elif (
-                tx_type == "Nexo Card Purchase"
-                and input_currency in _USD_CURRENCIES
-                and output_currency == "EUR"
-            ):
-                usd_amount = abs(input_amount)
-                eur_amount = Decimal(row["Output Amount"])
-                fx_observations.append(
-                    FxObservation(
-                        date=date, eur_amount=eur_amount, usd_amount=usd_amount
-                    )
-                )
-                card_purchase_events.append(
-                    CardPurchaseEvent(
-                        tx_id=tx_id,
-                        date=date,
-                        eur_amount=eur_amount,
-                        usd_amount=usd_amount,
-                        merchant=merchant,
-                    )
-                )
-            elif (
-                tx_type == "Exchange Liquidation"
-                and input_currency in {"EUR", "EURX"}
-                and output_currency in _USD_CURRENCIES
-            ):
-                repayment_events.append(
-                    RepaymentEvent(
-                        tx_id=tx_id,
-                        date=date,
-                        eur_amount=abs(input_amount),
-                        usd_amount=Decimal(row["Output Amount"]),
-                    )
-                )
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        return result  # empty export
+    col = _header_columns(header)
+    type_i = col.tx_type
+    handlers = _ROW_HANDLERS
+
+    for row in reader:
+        if not row:
+            continue  # blank line (DictReader used to skip these)
+        handler = handlers.get(row[type_i])
+        if handler is not None:
+            handler(row, col, result)
 
     # Sort all by date ascending (CSV is reverse chronological)
-    cashback_events.sort(key=lambda event: event.date)
-    cashback_reversal_events.sort(key=lambda event: event.date)
-    interest_events.sort(key=lambda event: event.date)
-    exchange_buy_events.sort(key=lambda event: event.date)
-    fx_observations.sort(key=lambda observation: observation.date)
-    disposal_events.sort(key=lambda event: event.date)
-    card_purchase_events.sort(key=lambda event: event.date)
-    repayment_events.sort(key=lambda event: event.date)
+    result.cashback_events.sort(key=_by_date)
+    result.cashback_reversal_events.sort(key=_by_date)
+    result.interest_events.sort(key=_by_date)
+    result.exchange_buy_events.sort(key=_by_date)
+    result.fx_observations.sort(key=_by_date)
+    result.disposal_events.sort(key=_by_date)
+    result.card_purchase_events.sort(key=_by_date)
+    result.repayment_events.sort(key=_by_date)
 
-    return ParseResult(
-        cashback_events=cashback_events,
-        cashback_reversal_events=cashback_reversal_events,
-        interest_events=interest_events,
-        exchange_buy_events=exchange_buy_events,
-        fx_observations=fx_observations,
-        disposal_events=disposal_events,
-        card_purchase_events=card_purchase_events,
-        repayment_events=repayment_events,
-    )
+    return result
+
+
+def parse_csv(source: Path | IO[str]) -> ParseResult:
+    """Parse Nexo CSV export and classify transactions.
+
+    ``source`` is a path to the export or an already open text stream.
+    """
+    if not isinstance(source, (str, Path)):
+        return _parse_rows(source)
+    with open(source, newline="", encoding="utf-8") as f:
+        return _parse_rows(f)
+
+
+def parse_csv_from_string(content: str) -> ParseResult:
+    """Parse Nexo CSV export from string content and classify transactions."""
+    return _parse_rows(io.StringIO(content))
@@ -1,8 +1,9 @@
-import csv
 import logging
 from collections import deque
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 
+from nexo_tax.calculator import year_slice
 from nexo_tax.models import (
     AnnualSummary,
     CardAnalysisSummary,
@@ -15,9 +16,39 @@ from nexo_tax.models import (
 
 logger = logging.getLogger(__name__)
 
+# Audit CSVs are written line by line; a large buffer batches the writes
+AUDIT_BUFFER_SIZE = 1 << 20
+
 
 def print_summary(summary: AnnualSummary) -> None:
     """Print a console tax summary for the year."""
+    logger.info(format_summary(summary))
+
+
+def acquisition_range(lots_consumed: list) -> str:
+    """Return 'YYYY-MM-DD' or 'YYYY-MM-DD — YYYY-MM-DD' acquisition date range.
+
+    Finds the earliest and latest acquisition dates in a single pass.
+    """
+    if not lots_consumed:
+        return ""
+    earliest = latest = lots_consumed[0][3]
+    for _, _, _, acq_date in lots_consumed:
+        if acq_date < earliest:
+            earliest = acq_date
+        elif acq_date > latest:
+            latest = acq_date
+    earliest_str = earliest.strftime("%Y-%m-%d")
+    latest_str = latest.strftime("%Y-%m-%d")
+    return (
+        earliest_str
+        if earliest_str == latest_str
+        else f"{earliest_str} — {latest_str}"
+    )
+
+
+def format_summary(summary: AnnualSummary) -> str:
+    """Return the console tax summary for the year."""
     # Capital income: cashback (minus reversals) + interest
     net_cashback_eur = summary.total_cashback_eur - summary.total_cashback_reversal_eur
     total_income_eur = net_cashback_eur + summary.total_interest_eur
@@ -78,10 +109,7 @@ def print_summary(summary: AnnualSummary) -> None:
     if summary.disposal_results:
         for result in summary.disposal_results:
             d = result.disposal
-            acq_dates = [acq_date for _, _, _, acq_date in result.lots_consumed]
-            earliest_acq = min(acq_dates).strftime("%Y-%m-%d")
-            latest_acq = max(acq_dates).strftime("%Y-%m-%d")
-            acq_str = earliest_acq if earliest_acq == latest_acq else f"{earliest_acq} — {latest_acq}"
+            acq_str = acquisition_range(result.lots_consumed)
             lines += [
                 f"  Disposal: {d.description}",
                 f"    Selling date:    {d.date.strftime('%Y-%m-%d')}",
@@ -113,138 +141,151 @@ def print_summary(summary: AnnualSummary) -> None:
         )
     lines.append(f"\n{'=' * 60}\n")
 
-    logger.info("\n".join(lines))
+    return "\n".join(lines)
 
 
-def write_audit_csv(
-    output_dir: Path,
+def _q(value: str) -> str:
+    """Quote a free-text CSV field the way csv.QUOTE_ALL does."""
+    return '"' + value.replace('"', '""') + '"'
+
+
+def _csv_header(*columns: str) -> str:
+    """Return a fully quoted CSV header line."""
+    return ",".join(_q(column) for column in columns) + "\r\n"
+
+
+def _csv_lines(columns: tuple[str, ...], rows: Iterable[str]) -> Iterator[str]:
+    """Yield a fully quoted header line followed by the formatted rows."""
+    yield _csv_header(*columns)
+    yield from rows
+
+
+def _lots_detail(lots_consumed: list) -> str:
+    """Return 'tx_id:qty@cost; ...' describing the lots a disposal consumed."""
+    # A list rather than a generator: str.join builds one from its argument
+    # anyway, so handing it a list skips the generator round-trips
+    return "; ".join([
+        f"{tx_id}:{qty:.8f}@{cost:.2f}" for tx_id, qty, cost, _acq_date in lots_consumed
+    ])
+
+
+def audit_csv_lines(
     year: int,
     cashback_events: list[CashbackEvent],
     interest_events: list[InterestEvent],
     lots_by_asset: dict[str, deque[Lot]],
     summary: AnnualSummary,
-) -> None:
-    """Write detailed audit CSV files for acquisitions and disposals."""
-    output_dir.mkdir(parents=True, exist_ok=True)
+) -> Iterator[tuple[str, Iterable[str]]]:
+    """Yield ``(filename, lines)`` for the acquisition and disposal audit CSVs.
 
+    Event lists must be sorted by date, as returned by the parser. The
+    schemas are fixed, so rows are formatted directly as fully quoted lines
+    (matching ``csv.QUOTE_ALL`` output); only free-text fields go through
+    quote escaping. Lines are produced lazily, so each file must be consumed
+    before the next is requested.
+    """
     # Acquisitions CSV (cashback)
-    acq_path = output_dir / f"acquisitions_{year}.csv"
-    with open(acq_path, "w", newline="") as f:
-        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
-        writer.writerow(
-            ["tx_id", "date", "amount_nexo", "value_usd", "value_eur", "merchant"]
-        )
-        for ev in cashback_events:
-            if ev.date.year == year:
-                writer.writerow(
-                    [
-                        ev.tx_id,
-                        ev.date.strftime("%Y-%m-%d %H:%M:%S"),
-                        f"{ev.amount_nexo:.8f}",
-                        f"{ev.value_usd:.2f}",
-                        f"{ev.value_eur:.2f}",
-                        ev.merchant,
-                    ]
-                )
-    logger.info("  Wrote %s", acq_path)
+    acquisitions = (
+        f'{_q(ev.tx_id)},"{ev.date:%Y-%m-%d %H:%M:%S}","{ev.amount_nexo:.8f}",'
+        f'"{ev.value_usd:.2f}","{ev.value_eur:.2f}",{_q(ev.merchant)}\r\n'
+        for ev in year_slice(cashback_events, year)
+    )
+    yield f"acquisitions_{year}.csv", _csv_lines(
+        ("tx_id", "date", "amount_nexo", "value_usd", "value_eur", "merchant"),
+        acquisitions,
+    )
 
     # Interest CSV
-    int_path = output_dir / f"interest_{year}.csv"
-    with open(int_path, "w", newline="") as f:
-        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
-        writer.writerow(
-            ["tx_id", "date", "asset", "amount", "value_usd", "value_eur", "source"]
-        )
-        for ev in interest_events:
-            if ev.date.year == year:
-                writer.writerow(
-                    [
-                        ev.tx_id,
-                        ev.date.strftime("%Y-%m-%d %H:%M:%S"),
-                        ev.asset,
-                        f"{ev.amount:.8f}",
-                        f"{ev.value_usd:.2f}",
-                        f"{ev.value_eur:.2f}",
-                        ev.source,
-                    ]
-                )
-    logger.info("  Wrote %s", int_path)
+    interest = (
+        f'{_q(ev.tx_id)},"{ev.date:%Y-%m-%d %H:%M:%S}",{_q(ev.asset)},'
+        f'"{ev.amount:.8f}","{ev.value_usd:.2f}","{ev.value_eur:.2f}",'
+        f"{_q(ev.source)}\r\n"
+        for ev in year_slice(interest_events, year)
+    )
+    yield f"interest_{year}.csv", _csv_lines(
+        ("tx_id", "date", "asset", "amount", "value_usd", "value_eur", "source"),
+        interest,
+    )
 
     # Disposals CSV
-    disp_path = output_dir / f"disposals_{year}.csv"
-    with open(disp_path, "w", newline="") as f:
-        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
-        writer.writerow(
-            [
-                "tx_id",
-                "date",
-                "asset",
-                "quantity",
-                "proceeds_eur",
-                "fee_eur",
-                "cost_basis_eur",
-                "gain_eur",
-                "lots_consumed",
-                "description",
-            ]
-        )
-        for result in summary.disposal_results:
-            d = result.disposal
-            lots_detail = "; ".join(
-                f"{tx_id}:{qty:.8f}@{cost:.2f}"
-                for tx_id, qty, cost, _acq_date in result.lots_consumed
-            )
-            writer.writerow(
-                [
-                    d.tx_id,
-                    d.date.strftime("%Y-%m-%d %H:%M:%S"),
-                    d.asset,
-                    f"{d.quantity:.8f}",
-                    f"{d.proceeds_eur:.2f}",
-                    f"{d.fee_eur:.2f}",
-                    f"{result.cost_basis_eur:.2f}",
-                    f"{result.gain_eur:.2f}",
-                    lots_detail,
-                    d.description,
-                ]
-            )
-    logger.info("  Wrote %s", disp_path)
+    disposals = (
+        f'{_q(r.disposal.tx_id)},"{r.disposal.date:%Y-%m-%d %H:%M:%S}",'
+        f'{_q(r.disposal.asset)},"{r.disposal.quantity:.8f}",'
+        f'"{r.disposal.proceeds_eur:.2f}","{r.disposal.fee_eur:.2f}",'
+        f'"{r.cost_basis_eur:.2f}","{r.gain_eur:.2f}",'
+        f"{_q(_lots_detail(r.lots_consumed))},{_q(r.disposal.description)}\r\n"
+        for r in summary.disposal_results
+    )
+    yield f"disposals_{year}.csv", _csv_lines(
+        (
+            "tx_id",
+            "date",
+            "asset",
+            "quantity",
+            "proceeds_eur",
+            "fee_eur",
+            "cost_basis_eur",
+            "gain_eur",
+            "lots_consumed",
+            "description",
+        ),
+        disposals,
+    )
 
     # Remaining lots CSV
-    lots_path = output_dir / f"remaining_lots_{year}.csv"
-    with open(lots_path, "w", newline="") as f:
-        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
-        writer.writerow(
-            [
-                "tx_id",
-                "asset",
-                "acquired_date",
-                "source",
-                "original_qty",
-                "remaining_qty",
-                "cost_eur",
-            ]
-        )
-        for asset in sorted(lots_by_asset):
-            for lot in lots_by_asset[asset]:
-                if lot.remaining > 0:
-                    remaining_cost = lot.cost_eur * (lot.remaining / lot.quantity)
-                    writer.writerow(
-                        [
-                            lot.tx_id,
-                            lot.asset,
-                            lot.acquired_date.strftime("%Y-%m-%d %H:%M:%S"),
-                            lot.source,
-                            f"{lot.quantity:.8f}",
-                            f"{lot.remaining:.8f}",
-                            f"{remaining_cost:.2f}",
-                        ]
-                    )
-    logger.info("  Wrote %s", lots_path)
+    remaining_lots = (
+        f'{_q(lot.tx_id)},{_q(lot.asset)},"{lot.acquired_date:%Y-%m-%d %H:%M:%S}",'
+        f'{_q(lot.source)},"{lot.quantity:.8f}","{lot.remaining:.8f}",'
+        f'"{lot.cost_eur * (lot.remaining / lot.quantity):.2f}"\r\n'
+        for asset in sorted(lots_by_asset)
+        for lot in lots_by_asset[asset]
+        if lot.remaining > 0
+    )
+    yield f"remaining_lots_{year}.csv", _csv_lines(
+        (
+            "tx_id",
+            "asset",
+            "acquired_date",
+            "source",
+            "original_qty",
+            "remaining_qty",
+            "cost_eur",
+        ),
+        remaining_lots,
+    )
+
+
+def write_audit_csv(
+    output_dir: Path,
+    year: int,
+    cashback_events: list[CashbackEvent],
+    interest_events: list[InterestEvent],
+    lots_by_asset: dict[str, deque[Lot]],
+    summary: AnnualSummary,
+) -> None:
+    """Write detailed audit CSV files for acquisitions and disposals.
+
+    Event lists must be sorted by date, as returned by the parser.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for filename, lines in audit_csv_lines(
+        year, cashback_events, interest_events, lots_by_asset, summary
+    ):
+        path = output_dir / filename
+        with open(
+            path, "w", newline="", encoding="utf-8", buffering=AUDIT_BUFFER_SIZE
+        ) as f:
+            f.writelines(lines)
+        logger.info("  Wrote %s", path)
 
 
 def print_card_analysis(analysis: CardAnalysisSummary) -> None:
     """Print credit card cashback profitability analysis."""
+    logger.info(format_card_analysis(analysis))
+
+
+def format_card_analysis(analysis: CardAnalysisSummary) -> str:
+    """Return the credit card cashback profitability analysis."""
     lines = [
         f"\n{'=' * 60}",
         f"  Card Cashback Profitability — {analysis.year}",
@@ -269,7 +310,53 @@ def print_card_analysis(analysis: CardAnalysisSummary) -> None:
         f"    Effective rate:      {analysis.effective_rate_pct:>17.2f}%",
         f"\n{'=' * 60}\n",
     ]
-    logger.info("\n".join(lines))
+    return "\n".join(lines)
+
+
+def card_analysis_csv_lines(
+    analysis: CardAnalysisSummary,
+    card_purchases: list[CardPurchaseEvent],
+    repayments: list[RepaymentEvent],
+) -> tuple[str, list[str]]:
+    """Return ``(filename, lines)`` for the card analysis audit CSV.
+
+    Event lists must be sorted by date, as returned by the parser.
+    """
+    year = analysis.year
+    lines = [
+        _csv_header(
+            "section", "tx_id", "date", "eur_amount", "usd_amount", "merchant"
+        )
+    ]
+    lines.extend(
+        f'"purchase",{_q(ev.tx_id)},"{ev.date:%Y-%m-%d %H:%M:%S}",'
+        f'"{ev.eur_amount:.2f}","{ev.usd_amount:.2f}",{_q(ev.merchant)}\r\n'
+        for ev in year_slice(card_purchases, year)
+    )
+    lines.extend(
+        f'"repayment",{_q(ev.tx_id)},"{ev.date:%Y-%m-%d %H:%M:%S}",'
+        f'"{ev.eur_amount:.2f}","{ev.usd_amount:.2f}",""\r\n'
+        for ev in year_slice(repayments, year)
+    )
+
+    # Summary row
+    lines.append("\r\n")
+    lines.append(_csv_header("metric", "value"))
+    lines.extend(
+        f'"{metric}","{value:.2f}"\r\n'
+        for metric, value in (
+            ("total_purchase_eur", analysis.total_purchase_eur),
+            ("total_purchase_usd", analysis.total_purchase_usd),
+            ("total_repayment_eur", analysis.total_repayment_eur),
+            ("total_repayment_usd", analysis.total_repayment_usd),
+            ("fx_spread_eur", analysis.fx_spread_eur),
+            ("cashback_eur", analysis.cashback_eur),
+            ("cashback_tax_eur", analysis.cashback_tax_eur),
+            ("net_benefit_eur", analysis.net_benefit_eur),
+            ("effective_rate_pct", analysis.effective_rate_pct),
+        )
+    )
+    return f"card_analysis_{year}.csv", lines
 
 
 def write_card_analysis_csv(
@@ -278,50 +365,15 @@ def write_card_analysis_csv(
     card_purchases: list[CardPurchaseEvent],
     repayments: list[RepaymentEvent],
 ) -> None:
-    """Write card analysis audit CSV with per-transaction detail."""
-    output_dir.mkdir(parents=True, exist_ok=True)
-    year = analysis.year
-
-    path = output_dir / f"card_analysis_{year}.csv"
-    with open(path, "w", newline="") as f:
-        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
-        writer.writerow([
-            "section", "tx_id", "date", "eur_amount", "usd_amount", "merchant",
-        ])
-
-        for ev in card_purchases:
-            if ev.date.year == year:
-                writer.writerow([
-                    "purchase",
-                    ev.tx_id,
-                    ev.date.strftime("%Y-%m-%d %H:%M:%S"),
-                    f"{ev.eur_amount:.2f}",
-                    f"{ev.usd_amount:.2f}",
-                    ev.merchant,
-                ])
-
-        for ev in repayments:
-            if ev.date.year == year:
-                writer.writerow([
-                    "repayment",
-                    ev.tx_id,
-                    ev.date.strftime("%Y-%m-%d %H:%M:%S"),
-                    f"{ev.eur_amount:.2f}",
-                    f"{ev.usd_amount:.2f}",
-                    "",
-                ])
-
-        # Summary row
-        writer.writerow([])
-        writer.writerow(["metric", "value"])
-        writer.writerow(["total_purchase_eur", f"{analysis.total_purchase_eur:.2f}"])
-        writer.writerow(["total_purchase_usd", f"{analysis.total_purchase_usd:.2f}"])
-        writer.writerow(["total_repayment_eur", f"{analysis.total_repayment_eur:.2f}"])
-        writer.writerow(["total_repayment_usd", f"{analysis.total_repayment_usd:.2f}"])
-        writer.writerow(["fx_spread_eur", f"{analysis.fx_spread_eur:.2f}"])
-        writer.writerow(["cashback_eur", f"{analysis.cashback_eur:.2f}"])
-        writer.writerow(["cashback_tax_eur", f"{analysis.cashback_tax_eur:.2f}"])
-        writer.writerow(["net_benefit_eur", f"{analysis.net_benefit_eur:.2f}"])
-        writer.writerow(["effective_rate_pct", f"{analysis.effective_rate_pct:.2f}"])
+    """Write card analysis audit CSV with per-transaction detail.
 
+    Event lists must be sorted by date, as returned by the parser.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    filename, lines = card_analysis_csv_lines(analysis, card_purchases, repayments)
+    path = output_dir / filename
+    with open(
+        path, "w", newline="", encoding="utf-8", buffering=AUDIT_BUFFER_SIZE
+    ) as f:
+        f.writelines(lines)
     logger.info("  Wrote %s", path)
@@ -39,3 +39,7 @@ def test_all_required_columns_present() -> None:
 def test_extra_columns_allowed() -> None:
     header = VALID_HEADER.rstrip("\n") + ",ExtraColumn\n"
     validate_csv_schema(header)
+
+
+def test_crlf_header_passes() -> None:
+    validate_csv_schema(VALID_HEADER.replace("\n", "\r\n") + "TX1,Cashback\r\n")
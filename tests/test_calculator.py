@@ -8,6 +8,7 @@ from nexo_tax.calculator import (
     build_lot_queue,
     compute_annual_summary,
     process_disposal,
+    year_slice,
 )
 from nexo_tax.models import (
     CashbackEvent,
@@ -74,6 +75,31 @@ def _disposal(
     )
 
 
+class TestYearSlice:
+    def test_selects_events_within_year(self) -> None:
+        events = [
+            _cashback("TX1", "2024-12-31", "1", "1"),
+            _cashback("TX2", "2025-01-01", "1", "1"),
+            _cashback("TX3", "2025-12-31", "1", "1"),
+            _cashback("TX4", "2026-01-01", "1", "1"),
+        ]
+        assert [ev.tx_id for ev in year_slice(events, 2025)] == ["TX2", "TX3"]
+
+    def test_missing_year_is_empty(self) -> None:
+        events = [_cashback("TX1", "2024-06-01", "1", "1")]
+        assert year_slice(events, 2025) == []
+        assert year_slice([], 2025) == []
+
+    def test_years_at_datetime_limits(self) -> None:
+        events = [
+            _cashback("TX1", "2025-06-01", "1", "1"),
+            _cashback("TX2", "9999-12-31", "1", "1"),
+        ]
+        assert [ev.tx_id for ev in year_slice(events, 9999)] == ["TX2"]
+        assert year_slice(events, 0) == []
+        assert year_slice(events, 10000) == []
+
+
 class TestBuildLotQueue:
     def test_creates_lots_sorted_by_date(self) -> None:
         cashbacks = [
@@ -174,6 +200,31 @@ class TestProcessDisposal:
         assert lot2.remaining == Decimal("7")
         assert len(result.lots_consumed) == 2
 
+    def test_whole_lot_uses_exact_cost(self) -> None:
+        """A lot consumed whole contributes its cost as-is, with no pro-rata step.
+
+        The cost has more digits than the 28-digit default context, so the
+        pro-rata path (cost * (used / quantity)) would round it.
+        """
+        cost = Decimal("1.23456789012345678901234567891")
+        lot = Lot(
+            asset="NEXO",
+            acquired_date=datetime(2025, 1, 1),
+            quantity=Decimal("3.12345678"),
+            cost_eur=cost,
+            remaining=Decimal("3.12345678"),
+            tx_id="LOT1",
+        )
+        lots = deque([lot])
+        disposal = _disposal("D1", "2025-06-01", "3.12345678", "2.23456789")
+        result = process_disposal({"NEXO": lots}, disposal)
+        _tx_id, used, cost_from_lot, _acq_date = result.lots_consumed[0]
+        assert used == Decimal("3.12345678")
+        assert cost_from_lot == cost
+        assert cost * (used / lot.quantity) != cost
+        assert lot.remaining == Decimal("0")
+        assert not lots
+
     def test_insufficient_lots_raises(self) -> None:
         lots = deque([
             Lot(
@@ -156,26 +156,17 @@ class TestCardAnalysisParserIntegration:
     """Test that parser correctly creates CardPurchaseEvent and RepaymentEvent."""
 
     def test_card_purchase_parsed(self) -> None:
-        import tempfile
-        from pathlib import Path
-
-        from nexo_tax.parser import parse_csv
+        from nexo_tax.parser import parse_csv_from_string
 
         header = (
             "Transaction,Type,Input Currency,Input Amount,Output Currency,"
             "Output Amount,USD Equivalent,Fee,Fee Currency,Details,Date / Time (UTC)\n"
         )
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".csv", delete=False
-        ) as f:
-            f.write(header)
-            f.write(
-                'TX1,Nexo Card Purchase,USDX,-50.00000000,EUR,42.50000000,$50.00,-,-,'
-                '"approved / CRV*Shop A",2025-06-15 10:00:00\n'
-            )
-            path = Path(f.name)
-
-        result = parse_csv(path)
+        result = parse_csv_from_string(
+            header
+            + 'TX1,Nexo Card Purchase,USDX,-50.00000000,EUR,42.50000000,$50.00,-,-,'
+            '"approved / CRV*Shop A",2025-06-15 10:00:00\n'
+        )
         assert len(result.card_purchase_events) == 1
         ev = result.card_purchase_events[0]
         assert ev.tx_id == "TX1"
@@ -186,27 +177,18 @@ class TestCardAnalysisParserIntegration:
         assert len(result.fx_observations) == 1
 
     def test_exchange_liquidation_parsed(self) -> None:
-        import tempfile
-        from pathlib import Path
-
-        from nexo_tax.parser import parse_csv
+        from nexo_tax.parser import parse_csv_from_string
 
         header = (
             "Transaction,Type,Input Currency,Input Amount,Output Currency,"
             "Output Amount,USD Equivalent,Fee,Fee Currency,Details,Date / Time (UTC)\n"
         )
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".csv", delete=False
-        ) as f:
-            f.write(header)
-            f.write(
-                "TX2,Exchange Liquidation,EURX,-45.00000000,"
-                "USDX,50.00000000,$50.00,-,-,"
-                '"approved / Exchange",2025-06-20 14:00:00\n'
-            )
-            path = Path(f.name)
-
-        result = parse_csv(path)
+        result = parse_csv_from_string(
+            header
+            + "TX2,Exchange Liquidation,EURX,-45.00000000,"
+            "USDX,50.00000000,$50.00,-,-,"
+            '"approved / Exchange",2025-06-20 14:00:00\n'
+        )
         assert len(result.repayment_events) == 1
         ev = result.repayment_events[0]
         assert ev.tx_id == "TX2"
@@ -215,27 +197,44 @@ class TestCardAnalysisParserIntegration:
 
     def test_exchange_liquidation_eur_input(self) -> None:
         """Exchange Liquidation with EUR (not EURX) input currency."""
-        import tempfile
-        from pathlib import Path
-
-        from nexo_tax.parser import parse_csv
+        from nexo_tax.parser import parse_csv_from_string
 
         header = (
             "Transaction,Type,Input Currency,Input Amount,Output Currency,"
             "Output Amount,USD Equivalent,Fee,Fee Currency,Details,Date / Time (UTC)\n"
         )
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".csv", delete=False
-        ) as f:
-            f.write(header)
-            f.write(
-                'TX3,Exchange Liquidation,EUR,-30.00000000,xUSD,33.00000000,$33.00,-,-,'
-                '"approved / Exchange",2025-07-01 10:00:00\n'
-            )
-            path = Path(f.name)
-
-        result = parse_csv(path)
+        result = parse_csv_from_string(
+            header
+            + 'TX3,Exchange Liquidation,EUR,-30.00000000,xUSD,33.00000000,$33.00,-,-,'
+            '"approved / Exchange",2025-07-01 10:00:00\n'
+        )
         assert len(result.repayment_events) == 1
         ev = result.repayment_events[0]
         assert ev.eur_amount == Decimal("30.00000000")
         assert ev.usd_amount == Decimal("33.00000000")
+
+
+class TestWriteCardAnalysisCsv:
+    def test_writes_quoted_rows_and_metrics(self, tmp_path) -> None:
+        import csv
+
+        from nexo_tax.report import write_card_analysis_csv
+
+        purchases = [_purchase("P1", "2025-03-01", "85", "100")]
+        repayments = [_repayment("R1", "2025-04-01", "90", "100")]
+        analysis = compute_card_analysis(2025, purchases, repayments, Decimal("1.70"))
+
+        write_card_analysis_csv(tmp_path, analysis, purchases, repayments)
+
+        path = tmp_path / "card_analysis_2025.csv"
+        content = path.read_bytes().decode()
+        assert content.startswith('"section","tx_id","date"')
+        assert "\r\n\r\n" in content
+        rows = list(csv.reader(content.splitlines()))
+        assert rows[1] == [
+            "purchase", "P1", "2025-03-01 00:00:00", "85.00", "100.00", "Test Shop",
+        ]
+        assert rows[2] == [
+            "repayment", "R1", "2025-04-01 00:00:00", "90.00", "100.00", "",
+        ]
+        assert ["total_repayment_eur", "90.00"] in rows
@@ -1,7 +1,10 @@
 from datetime import datetime
 from decimal import Decimal
 
-from nexo_tax.fx import FxRateTable, build_daily_rates
+import pytest
+
+from nexo_tax.fx import FxRateTable, apply_eur_values, build_daily_rates
+from nexo_tax.models import DisposalEvent
 from nexo_tax.parser import FxObservation
 
 
@@ -68,3 +71,55 @@ class TestFxRateTable:
         fx = FxRateTable([_obs("2025-06-15 10:00:00", "85", "100")])
         eur = fx.convert_usd_to_eur(Decimal("10"), datetime(2025, 6, 15, 10, 0, 0))
         assert eur == Decimal("10") * Decimal("85") / Decimal("100")
+
+    def test_rates_for_dates_matches_single_lookup(self) -> None:
+        fx = FxRateTable([
+            _obs("2025-06-10 10:00:00", "85", "100"),
+            _obs("2025-06-20 10:00:00", "86", "100"),
+        ])
+        dts = [
+            datetime(2025, 6, 1, 9, 0, 0),
+            datetime(2025, 6, 10, 23, 0, 0),
+            datetime(2025, 6, 15, 0, 0, 0),  # tie → earlier date
+            datetime(2025, 6, 18, 0, 0, 0),
+            datetime(2025, 6, 12, 0, 0, 0),  # out of order
+            datetime(2025, 7, 1, 0, 0, 0),
+        ]
+        assert fx.rates_for_dates(dts) == [fx.rate_for_date(dt) for dt in dts]
+
+    def test_rates_for_dates_miss_after_earlier_exact_hit(self) -> None:
+        """A backward exact hit must not leave the cursor past a later miss."""
+        fx = FxRateTable([
+            _obs("2025-06-10 10:00:00", "85", "100"),
+            _obs("2025-06-20 10:00:00", "86", "100"),
+            _obs("2025-06-30 10:00:00", "87", "100"),
+        ])
+        dts = [
+            datetime(2025, 6, 25, 0, 0, 0),
+            datetime(2025, 6, 10, 12, 0, 0),  # exact hit, earlier than cursor
+            datetime(2025, 6, 12, 0, 0, 0),  # miss nearest 06-10
+        ]
+        rates = fx.rates_for_dates(dts)
+        assert rates == [fx.rate_for_date(dt) for dt in dts]
+        assert rates[2] == Decimal("85") / Decimal("100")
+
+    def test_rates_for_dates_without_observations_raises(self) -> None:
+        fx = FxRateTable([])
+        assert fx.rates_for_dates([]) == []
+        with pytest.raises(ValueError, match="No FX observations"):
+            fx.rates_for_dates([datetime(2025, 6, 15)])
+
+    def test_apply_eur_values_to_named_fields(self) -> None:
+        fx = FxRateTable([_obs("2025-06-15 10:00:00", "85", "100")])
+        disposal = DisposalEvent(
+            tx_id="D1",
+            date=datetime(2025, 6, 15, 12, 0, 0),
+            asset="NEXO",
+            quantity=Decimal("1"),
+            proceeds_usd=Decimal("10"),
+            proceeds_eur=Decimal("0"),
+            fee_eur=Decimal("0"),
+            description="",
+        )
+        apply_eur_values(fx, [disposal], "proceeds_usd", "proceeds_eur")
+        assert disposal.proceeds_eur == Decimal("8.50")
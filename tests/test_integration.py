@@ -1,9 +1,13 @@
-import tempfile
+import csv
+import io
 from decimal import Decimal
-from pathlib import Path
 
+import pytest
+
+from nexo_tax.api import run
 from nexo_tax.calculator import build_lot_queue, compute_annual_summary
-from nexo_tax.fx import FxRateTable
+from nexo_tax.cli.main import main
+from nexo_tax.fx import FxRateTable, apply_eur_values
 from nexo_tax.parser import parse_csv, parse_csvs
 
 CSV_HEADER = (
@@ -12,18 +16,14 @@ CSV_HEADER = (
 )
 
 
-def _write_csv(rows: list[str]) -> Path:
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as f:
-        f.write(CSV_HEADER)
-        for row in rows:
-            f.write(row + "\n")
-    return Path(f.name)
+def _csv_stream(rows: list[str]) -> io.StringIO:
+    return io.StringIO(CSV_HEADER + "".join(row + "\n" for row in rows))
 
 
 class TestEndToEnd:
     def test_full_pipeline(self) -> None:
         """Simulate: card purchases, cashback, interest, exchange buy, disposal."""
-        path = _write_csv([
+        source = _csv_stream([
             # Card purchases (FX observations): rate ~0.85
             'P1,Nexo Card Purchase,xUSD,-100.00000000,EUR,85.00000000,$100.00,-,-,'
             '"approved / Shop A",2025-03-01 10:00:00',
@@ -52,7 +52,7 @@ class TestEndToEnd:
         ])
 
         # Parse
-        result = parse_csv(path)
+        result = parse_csv(source)
         assert len(result.cashback_events) == 2
         assert len(result.interest_events) == 2  # NEXO + BTC
         assert len(result.exchange_buy_events) == 2  # EURX→NEXO + NEXO→BTC buy side
@@ -61,14 +61,10 @@ class TestEndToEnd:
 
         # Build FX and apply EUR values
         fx = FxRateTable(result.fx_observations)
-        for ev in result.cashback_events:
-            ev.value_eur = fx.convert_usd_to_eur(ev.value_usd, ev.date)
-        for ev in result.interest_events:
-            ev.value_eur = fx.convert_usd_to_eur(ev.value_usd, ev.date)
-        for ev in result.exchange_buy_events:
-            ev.value_eur = fx.convert_usd_to_eur(ev.value_usd, ev.date)
-        for ev in result.disposal_events:
-            ev.proceeds_eur = fx.convert_usd_to_eur(ev.proceeds_usd, ev.date)
+        apply_eur_values(fx, result.cashback_events)
+        apply_eur_values(fx, result.interest_events)
+        apply_eur_values(fx, result.exchange_buy_events)
+        apply_eur_values(fx, result.disposal_events, "proceeds_usd", "proceeds_eur")
 
         # C1: $2.00 * 0.85 = 1.70 EUR
         assert result.cashback_events[0].value_eur == Decimal("1.70")
@@ -111,17 +107,16 @@ class TestEndToEnd:
 
     def test_no_disposals(self) -> None:
         """Year with only cashback, no disposals."""
-        path = _write_csv([
+        source = _csv_stream([
             'P1,Nexo Card Purchase,xUSD,-100.00000000,EUR,85.00000000,$100.00,-,-,'
             '"approved / Shop A",2025-03-01 10:00:00',
             'C1,Cashback,NEXO,10.00000000,NEXO,10.00000000,$2.00,-,-,'
             '"approved / Shop A",2025-03-01 10:05:00',
         ])
 
-        result = parse_csv(path)
+        result = parse_csv(source)
         fx = FxRateTable(result.fx_observations)
-        for ev in result.cashback_events:
-            ev.value_eur = fx.convert_usd_to_eur(ev.value_usd, ev.date)
+        apply_eur_values(fx, result.cashback_events)
 
         lots_by_asset = build_lot_queue(result.cashback_events, [], [])
         summary = compute_annual_summary(
@@ -137,7 +132,7 @@ class TestEndToEnd:
 
     def test_multi_year_lots_carry_forward(self) -> None:
         """2024 lots carry forward to 2025 disposal via FIFO."""
-        path_2024 = _write_csv([
+        csv_2024 = _csv_stream([
             # 2024 FX observation
             'P1,Nexo Card Purchase,USD,-100.00000000,EUR,90.00000000,$100.00,-,-,'
             '"approved / Shop",2024-08-01 10:00:00',
@@ -145,7 +140,7 @@ class TestEndToEnd:
             'C1,Cashback,NEXO,20.00000000,NEXO,20.00000000,$4.00,-,-,'
             '"approved / Shop",2024-08-01 10:05:00',
         ])
-        path_2025 = _write_csv([
+        csv_2025 = _csv_stream([
             # 2025 FX observation
             'P2,Nexo Card Purchase,xUSD,-100.00000000,EUR,85.00000000,$100.00,-,-,'
             '"approved / Shop",2025-03-01 10:00:00',
@@ -157,14 +152,11 @@ class TestEndToEnd:
             '"approved / Exchange NEXO Token to Bitcoin",2025-09-01 10:00:00',
         ])
 
-        result = parse_csvs([path_2024, path_2025])
+        result = parse_csvs([csv_2024, csv_2025])
         fx = FxRateTable(result.fx_observations)
-        for ev in result.cashback_events:
-            ev.value_eur = fx.convert_usd_to_eur(ev.value_usd, ev.date)
-        for ev in result.exchange_buy_events:
-            ev.value_eur = fx.convert_usd_to_eur(ev.value_usd, ev.date)
-        for ev in result.disposal_events:
-            ev.proceeds_eur = fx.convert_usd_to_eur(ev.proceeds_usd, ev.date)
+        apply_eur_values(fx, result.cashback_events)
+        apply_eur_values(fx, result.exchange_buy_events)
+        apply_eur_values(fx, result.disposal_events, "proceeds_usd", "proceeds_eur")
 
         lots_by_asset = build_lot_queue(
             result.cashback_events, [], result.exchange_buy_events
@@ -204,7 +196,7 @@ class TestEndToEnd:
 
     def test_crypto_to_crypto_swap_pipeline(self) -> None:
         """BTC interest → BTC→ETH swap → ETH→EUR disposal."""
-        path = _write_csv([
+        source = _csv_stream([
             # FX observation
             'P1,Nexo Card Purchase,xUSD,-100.00000000,EUR,85.00000000,$100.00,-,-,'
             '"approved / Shop",2025-01-01 10:00:00',
@@ -219,18 +211,15 @@ class TestEndToEnd:
             '"approved / Exchange Ethereum to EUR",2025-09-01 10:00:00',
         ])
 
-        result = parse_csv(path)
+        result = parse_csv(source)
         # BTC→ETH creates both a disposal (BTC) and exchange buy (ETH)
         assert len(result.disposal_events) == 2  # BTC disposal + ETH disposal
         assert len(result.exchange_buy_events) == 1  # ETH buy from swap
 
         fx = FxRateTable(result.fx_observations)
-        for ev in result.interest_events:
-            ev.value_eur = fx.convert_usd_to_eur(ev.value_usd, ev.date)
-        for ev in result.exchange_buy_events:
-            ev.value_eur = fx.convert_usd_to_eur(ev.value_usd, ev.date)
-        for ev in result.disposal_events:
-            ev.proceeds_eur = fx.convert_usd_to_eur(ev.proceeds_usd, ev.date)
+        apply_eur_values(fx, result.interest_events)
+        apply_eur_values(fx, result.exchange_buy_events)
+        apply_eur_values(fx, result.disposal_events, "proceeds_usd", "proceeds_eur")
 
         lots_by_asset = build_lot_queue(
             [], result.interest_events, result.exchange_buy_events
@@ -266,3 +255,126 @@ class TestEndToEnd:
         assert eth_dr.gain_eur == Decimal("127.50")  # 552.50 - 425
         # All lots consumed
         assert summary.remaining_lots == 0
+
+
+class TestApiRun:
+    def test_audit_csvs_quote_free_text(self) -> None:
+        """Audit CSVs round-trip merchants containing quotes and commas."""
+        content = CSV_HEADER + "\n".join([
+            'P1,Nexo Card Purchase,xUSD,-100.00000000,EUR,85.00000000,$100.00,-,-,'
+            '"approved / Café ""Bar"", Ltd",2025-03-01 10:00:00',
+            'C1,Cashback,NEXO,10.00000000,NEXO,10.00000000,$2.00,-,-,'
+            '"approved / Café ""Bar"", Ltd",2025-03-01 10:05:00',
+        ]) + "\n"
+
+        result = run([content], [2025], audit_csv=True)
+        files = result["audit_files"]
+
+        acq_rows = list(csv.reader(io.StringIO(files["acquisitions_2025.csv"])))
+        assert acq_rows == [
+            ["tx_id", "date", "amount_nexo", "value_usd", "value_eur", "merchant"],
+            ["C1", "2025-03-01 10:05:00", "10.00000000", "2.00", "1.70",
+             'Café "Bar", Ltd'],
+        ]
+        assert files["acquisitions_2025.csv"].endswith('"Café ""Bar"", Ltd"\r\n')
+
+        card_rows = list(csv.reader(io.StringIO(files["card_analysis_2025.csv"])))
+        assert card_rows[1] == [
+            "purchase", "P1", "2025-03-01 10:00:00", "85.00", "100.00",
+            'Café "Bar", Ltd',
+        ]
+        assert ["total_purchase_eur", "85.00"] in card_rows
+
+    def test_sink_streams_same_audit_csvs(self) -> None:
+        content = CSV_HEADER + "\n".join([
+            "P1,Nexo Card Purchase,xUSD,-100.00000000,EUR,85.00000000,$100.00,-,-,"
+            "approved / Shop,2024-03-01 10:00:00",
+            "C1,Cashback,NEXO,10.00000000,NEXO,10.00000000,$2.00,-,-,"
+            "approved / Shop,2024-03-01 10:05:00",
+        ]) + "\n"
+        in_memory = run([content], [2024], audit_csv=True)["audit_files"]
+
+        sinks: dict[str, io.StringIO] = {}
+
+        def sink(filename: str) -> io.StringIO:
+            # Keep the buffer readable after run() closes the handle
+            buf = io.StringIO()
+            buf.close = lambda: None
+            sinks[filename] = buf
+            return buf
+
+        result = run([content], [2024], audit_csv=True, sink=sink)
+        assert result["audit_files"] == {}
+        assert {name: buf.getvalue() for name, buf in sinks.items()} == in_memory
+
+    def test_repeated_runs_return_same_console(self) -> None:
+        content = CSV_HEADER + "\n".join([
+            "P1,Nexo Card Purchase,xUSD,-100.00000000,EUR,85.00000000,$100.00,-,-,"
+            "approved / Shop,2024-03-01 10:00:00",
+            "C1,Cashback,NEXO,10.00000000,NEXO,10.00000000,$2.00,-,-,"
+            "approved / Shop,2024-03-01 10:05:00",
+        ]) + "\n"
+        first = run([content], [2024])["console"]
+        assert first.startswith("Parsed 1 cashback events\n")
+        assert run([content], [2024])["console"] == first
+
+
+class TestCliMain:
+    def test_failed_year_leaves_existing_audit_files(
+        self, tmp_path, monkeypatch
+    ) -> None:
+        """A later year failing must not rewrite earlier years' audit CSVs."""
+        export = tmp_path / "export.csv"
+        export.write_text(
+            CSV_HEADER + "\n".join([
+                "P1,Nexo Card Purchase,xUSD,-100.00000000,EUR,90.00000000,$100.00,"
+                "-,-,approved / Shop,2024-08-01 10:00:00",
+                "C1,Cashback,NEXO,20.00000000,NEXO,20.00000000,$4.00,-,-,"
+                "approved / Shop,2024-08-01 10:05:00",
+                # 2025 disposal needs more NEXO than was ever acquired
+                "D1,Exchange,NEXO,-25.00000000,BTC,0.00200000,$20.00,-,-,"
+                "approved / Exchange NEXO Token to Bitcoin,2025-09-01 10:00:00",
+            ]) + "\n",
+            encoding="utf-8",
+        )
+        output = tmp_path / "output"
+        output.mkdir()
+        stale = output / "acquisitions_2024.csv"
+        stale.write_text("stale\n")
+
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(
+            "sys.argv",
+            ["nexo-tax", str(export), "--year", "2024", "2025", "--audit-csv"],
+        )
+        with pytest.raises(SystemExit) as exc_info:
+            main()
+
+        assert exc_info.value.code == 1
+        assert stale.read_text() == "stale\n"
+        assert sorted(p.name for p in output.iterdir()) == ["acquisitions_2024.csv"]
+
+    def test_repeated_year_writes_each_audit_file_once(
+        self, tmp_path, monkeypatch
+    ) -> None:
+        export = tmp_path / "export.csv"
+        export.write_text(
+            CSV_HEADER + "\n".join([
+                "P1,Nexo Card Purchase,xUSD,-100.00000000,EUR,90.00000000,$100.00,"
+                "-,-,approved / Shop,2024-08-01 10:00:00",
+                "C1,Cashback,NEXO,20.00000000,NEXO,20.00000000,$4.00,-,-,"
+                "approved / Shop,2024-08-01 10:05:00",
+            ]) + "\n",
+            encoding="utf-8",
+        )
+
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(
+            "sys.argv",
+            ["nexo-tax", str(export), "--year", "2024", "2024", "--audit-csv"],
+        )
+        main()
+
+        names = sorted(p.name for p in (tmp_path / "output").iterdir())
+        assert "acquisitions_2024.csv" in names
+        assert not [name for name in names if name.endswith(".tmp")]
@@ -1,8 +1,17 @@
-import tempfile
+import io
+from datetime import datetime
 from decimal import Decimal
-from pathlib import Path
 
-from nexo_tax.parser import _extract_merchant, _parse_usd, parse_csv, parse_csvs
+import pytest
+
+from nexo_tax.parser import (
+    _extract_merchant,
+    _parse_date,
+    _parse_usd,
+    parse_csv,
+    parse_csv_from_string,
+    parse_csvs,
+)
 
 CSV_HEADER = (
     "Transaction,Type,Input Currency,Input Amount,Output Currency,"
@@ -10,12 +19,8 @@ CSV_HEADER = (
 )
 
 
-def _write_csv(rows: list[str]) -> Path:
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as f:
-        f.write(CSV_HEADER)
-        for row in rows:
-            f.write(row + "\n")
-    return Path(f.name)
+def _csv_stream(rows: list[str]) -> io.StringIO:
+    return io.StringIO(CSV_HEADER + "".join(row + "\n" for row in rows))
 
 
 class TestParseUsd:
@@ -36,11 +41,11 @@ class TestExtractMerchant:
 
 class TestParseCsv:
     def test_parses_cashback(self) -> None:
-        path = _write_csv([
+        source = _csv_stream([
             'TX1,Cashback,NEXO,2.50000000,NEXO,2.50000000,$2.30,-,-,'
             '"approved / CRV*Wolt Poland POL",2025-06-15 10:00:00',
         ])
-        result = parse_csv(path)
+        result = parse_csv(source)
         assert len(result.cashback_events) == 1
         ev = result.cashback_events[0]
         assert ev.tx_id == "TX1"
@@ -49,44 +54,44 @@ class TestParseCsv:
         assert ev.merchant == "CRV*Wolt Poland POL"
 
     def test_parses_card_purchase_xusd_as_fx(self) -> None:
-        path = _write_csv([
+        source = _csv_stream([
             'TX2,Nexo Card Purchase,xUSD,-10.00000000,EUR,8.50000000,$10.00,-,-,'
             '"approved / CRV*Shop",2025-06-15 10:00:00',
         ])
-        result = parse_csv(path)
+        result = parse_csv(source)
         assert len(result.fx_observations) == 1
         obs = result.fx_observations[0]
         assert obs.usd_amount == Decimal("10.00000000")
         assert obs.eur_amount == Decimal("8.50000000")
 
     def test_parses_card_purchase_usdx_as_fx(self) -> None:
-        path = _write_csv([
+        source = _csv_stream([
             'TX2B,Nexo Card Purchase,USDX,-20.00000000,EUR,17.00000000,$20.00,-,-,'
             '"approved / CRV*Shop B",2025-06-15 10:00:00',
         ])
-        result = parse_csv(path)
+        result = parse_csv(source)
         assert len(result.fx_observations) == 1
         obs = result.fx_observations[0]
         assert obs.usd_amount == Decimal("20.00000000")
         assert obs.eur_amount == Decimal("17.00000000")
 
     def test_parses_card_purchase_usd_as_fx(self) -> None:
-        path = _write_csv([
+        source = _csv_stream([
             'TX2C,Nexo Card Purchase,USD,-30.00000000,EUR,25.50000000,$30.00,-,-,'
             '"approved / CRV*Shop C",2024-08-15 10:00:00',
         ])
-        result = parse_csv(path)
+        result = parse_csv(source)
         assert len(result.fx_observations) == 1
         obs = result.fx_observations[0]
         assert obs.usd_amount == Decimal("30.00000000")
         assert obs.eur_amount == Decimal("25.50000000")
 
     def test_parses_exchange_disposal(self) -> None:
-        path = _write_csv([
+        source = _csv_stream([
             'TX3,Exchange,NEXO,-487.00000000,BTC,0.00488461,$511.68,-,-,'
             '"approved / Exchange NEXO Token to Bitcoin",2025-11-11 07:58:24',
         ])
-        result = parse_csv(path)
+        result = parse_csv(source)
         assert len(result.disposal_events) == 1
         ev = result.disposal_events[0]
         assert ev.tx_id == "TX3"
@@ -100,22 +105,22 @@ class TestParseCsv:
         assert buy.amount == Decimal("0.00488461")
 
     def test_parses_nexo_interest(self) -> None:
-        path = _write_csv([
+        source = _csv_stream([
             'TX4,Interest,NEXO,1.00000000,NEXO,1.00000000,$0.90,-,-,'
             '"approved / Interest",2025-06-15 10:00:00',
         ])
-        result = parse_csv(path)
+        result = parse_csv(source)
         assert len(result.interest_events) == 1
         ev = result.interest_events[0]
         assert ev.asset == "NEXO"
         assert ev.amount == Decimal("1.00000000")
 
     def test_parses_btc_interest(self) -> None:
-        path = _write_csv([
+        source = _csv_stream([
             'TX5,Interest,BTC,0.00010000,BTC,0.00010000,$4.00,-,-,'
             '"approved / Interest",2025-06-15 10:00:00',
         ])
-        result = parse_csv(path)
+        result = parse_csv(source)
         assert len(result.interest_events) == 1
         ev = result.interest_events[0]
         assert ev.asset == "BTC"
@@ -123,11 +128,11 @@ class TestParseCsv:
         assert ev.value_usd == Decimal("4.00")
 
     def test_parses_usdt_interest(self) -> None:
-        path = _write_csv([
+        source = _csv_stream([
             'TX6,Fixed Term Interest,USDT,1.20000000,USDT,1.20000000,$1.20,-,-,'
             '"approved / Fixed Term Interest",2025-06-15 10:00:00',
         ])
-        result = parse_csv(path)
+        result = parse_csv(source)
         assert len(result.interest_events) == 1
         ev = result.interest_events[0]
         assert ev.asset == "USDT"
@@ -135,11 +140,11 @@ class TestParseCsv:
 
     def test_parses_fiat_to_crypto_exchange_buy(self) -> None:
         """EURX → BTC creates an ExchangeBuyEvent(asset='BTC')."""
-        path = _write_csv([
+        source = _csv_stream([
             'TX7,Exchange,EURX,-500.00000000,BTC,0.01000000,$530.00,-,-,'
             '"approved / Exchange EURX to Bitcoin",2025-07-01 10:00:00',
         ])
-        result = parse_csv(path)
+        result = parse_csv(source)
         assert len(result.exchange_buy_events) == 1
         ev = result.exchange_buy_events[0]
         assert ev.asset == "BTC"
@@ -151,11 +156,11 @@ class TestParseCsv:
 
     def test_parses_crypto_to_fiat_disposal(self) -> None:
         """BTC → EUR creates a DisposalEvent(asset='BTC'), no exchange buy."""
-        path = _write_csv([
+        source = _csv_stream([
             'TX8,Exchange,BTC,-0.01000000,EUR,500.00000000,$530.00,-,-,'
             '"approved / Exchange Bitcoin to EUR",2025-08-01 10:00:00',
         ])
-        result = parse_csv(path)
+        result = parse_csv(source)
         assert len(result.disposal_events) == 1
         ev = result.disposal_events[0]
         assert ev.asset == "BTC"
@@ -165,11 +170,11 @@ class TestParseCsv:
 
     def test_parses_crypto_to_crypto_swap(self) -> None:
         """BTC → ETH creates both a DisposalEvent(BTC) and ExchangeBuyEvent(ETH)."""
-        path = _write_csv([
+        source = _csv_stream([
             'TX9,Exchange,BTC,-0.50000000,ETH,8.00000000,$20000.00,-,-,'
             '"approved / Exchange Bitcoin to Ethereum",2025-09-01 10:00:00',
         ])
-        result = parse_csv(path)
+        result = parse_csv(source)
         assert len(result.disposal_events) == 1
         disp = result.disposal_events[0]
         assert disp.asset == "BTC"
@@ -182,11 +187,11 @@ class TestParseCsv:
 
     def test_parses_cashback_reversal(self) -> None:
         """Nexo Card Cashback Reversal creates a CashbackReversalEvent."""
-        path = _write_csv([
+        source = _csv_stream([
             'TX10,Nexo Card Cashback Reversal,USD,-3.76000000,EUR,3.59,$3.76,-,-,'
             '"approved",2024-12-23 00:16:35',
         ])
-        result = parse_csv(path)
+        result = parse_csv(source)
         assert len(result.cashback_reversal_events) == 1
         ev = result.cashback_reversal_events[0]
         assert ev.tx_id == "TX10"
@@ -197,12 +202,12 @@ class TestParseCsv:
 
     def test_parses_exchange_collateral(self) -> None:
         """Exchange Collateral (USDT→USDC) creates disposal + exchange buy."""
-        path = _write_csv([
+        source = _csv_stream([
             'TX11,Exchange Collateral,USDT,-2803.11045400,USDC,2802.26977300,'
             '$2801.96,-,-,'
             '"approved / Collateral Exchange Tether to USD Coin",2025-03-12 20:23:26',
         ])
-        result = parse_csv(path)
+        result = parse_csv(source)
         assert len(result.disposal_events) == 1
         disp = result.disposal_events[0]
         assert disp.asset == "USDT"
@@ -215,7 +220,7 @@ class TestParseCsv:
 
     def test_skips_fiat_interest(self) -> None:
         """Interest on fiat currencies should not create lots."""
-        path = _write_csv([
+        source = _csv_stream([
             'TX_USDX,Interest,USDX,0.50000000,USDX,0.50000000,$0.50,-,-,'
             '"approved / Interest",2025-06-15 10:00:00',
             'TX_XUSD,Interest,xUSD,0.30000000,xUSD,0.30000000,$0.30,-,-,'
@@ -223,16 +228,16 @@ class TestParseCsv:
             'TX_EURX,Interest,EURX,0.20000000,EURX,0.20000000,$0.21,-,-,'
             '"approved / Interest",2025-06-15 12:00:00',
         ])
-        result = parse_csv(path)
+        result = parse_csv(source)
         assert len(result.interest_events) == 0
 
     def test_parses_manual_sell_order_crypto(self) -> None:
         """Manual Sell Order for crypto creates a DisposalEvent."""
-        path = _write_csv([
+        source = _csv_stream([
             'TX_MSO,Manual Sell Order,USDT,-51.67888500,USDT,0.00000000,$51.46,-,-,'
             '"approved / Crypto Repayment",2025-11-05 07:09:16',
         ])
-        result = parse_csv(path)
+        result = parse_csv(source)
         assert len(result.disposal_events) == 1
         ev = result.disposal_events[0]
         assert ev.tx_id == "TX_MSO"
@@ -243,20 +248,20 @@ class TestParseCsv:
 
     def test_skips_manual_sell_order_fiat(self) -> None:
         """Manual Sell Order for fiat (EURX, USDX) should not create disposal."""
-        path = _write_csv([
+        source = _csv_stream([
             'TX_MSO2,Manual Sell Order,EURX,-62.03000000,EURX,0.00000000,$64.58,-,-,'
             '"approved / Crypto Repayment",2024-12-31 11:58:38',
         ])
-        result = parse_csv(path)
+        result = parse_csv(source)
         assert len(result.disposal_events) == 0
 
     def test_parses_top_up_crypto(self) -> None:
         """Top up Crypto creates an ExchangeBuyEvent."""
-        path = _write_csv([
+        source = _csv_stream([
             'TX_TOP,Top up Crypto,USDT,10.06467500,USDT,10.06467500,$10.07,-,-,'
             '"approved / 0xabc123",2024-08-28 07:44:40',
         ])
-        result = parse_csv(path)
+        result = parse_csv(source)
         assert len(result.exchange_buy_events) == 1
         ev = result.exchange_buy_events[0]
         assert ev.tx_id == "TX_TOP"
@@ -266,11 +271,11 @@ class TestParseCsv:
 
     def test_parses_withdrawal(self) -> None:
         """Withdrawal creates a DisposalEvent."""
-        path = _write_csv([
+        source = _csv_stream([
             'TX_WD,Withdrawal,NEXO,-20.00000000,NEXO,20.00000000,$26.64,-,-,'
             '"approved / NEXO withdrawal",2024-12-26 09:15:30',
         ])
-        result = parse_csv(path)
+        result = parse_csv(source)
         assert len(result.disposal_events) == 1
         ev = result.disposal_events[0]
         assert ev.tx_id == "TX_WD"
@@ -280,36 +285,121 @@ class TestParseCsv:
         assert ev.description == "NEXO withdrawal"
 
     def test_skips_unrelated_types(self) -> None:
-        path = _write_csv([
+        source = _csv_stream([
             'TX4,Interest,NEXO,1.00000000,NEXO,1.00000000,$0.90,-,-,'
             '"approved / Interest",2025-06-15 10:00:00',
         ])
-        result = parse_csv(path)
+        result = parse_csv(source)
         assert len(result.cashback_events) == 0
         assert len(result.fx_observations) == 0
         assert len(result.disposal_events) == 0
 
     def test_sorts_by_date_ascending(self) -> None:
-        path = _write_csv([
+        source = _csv_stream([
             'TX_LATE,Cashback,NEXO,1.00000000,NEXO,1.00000000,$1.00,-,-,'
             '"approved / Late",2025-12-01 10:00:00',
             'TX_EARLY,Cashback,NEXO,2.00000000,NEXO,2.00000000,$2.00,-,-,'
             '"approved / Early",2025-01-01 10:00:00',
         ])
-        result = parse_csv(path)
+        result = parse_csv(source)
         assert result.cashback_events[0].tx_id == "TX_EARLY"
         assert result.cashback_events[1].tx_id == "TX_LATE"
 
     def test_parse_csvs_merges_and_sorts(self) -> None:
-        path1 = _write_csv([
+        csv1 = _csv_stream([
             'TX_2025,Cashback,NEXO,1.00000000,NEXO,1.00000000,$1.00,-,-,'
             '"approved / Shop 2025",2025-03-01 10:00:00',
         ])
-        path2 = _write_csv([
+        csv2 = _csv_stream([
             'TX_2024,Cashback,NEXO,2.00000000,NEXO,2.00000000,$2.00,-,-,'
             '"approved / Shop 2024",2024-08-01 10:00:00',
         ])
-        result = parse_csvs([path1, path2])
+        result = parse_csvs([csv1, csv2])
         assert len(result.cashback_events) == 2
         assert result.cashback_events[0].tx_id == "TX_2024"
         assert result.cashback_events[1].tx_id == "TX_2025"
+
+    def test_parses_csv_file_path(self, tmp_path) -> None:
+        path = tmp_path / "export.csv"
+        path.write_text(
+            CSV_HEADER
+            + 'TX1,Cashback,NEXO,2.50000000,NEXO,2.50000000,$2.30,-,-,'
+            '"approved / Shop",2025-06-15 10:00:00\n',
+            encoding="utf-8",
+        )
+        result = parse_csv(path)
+        assert [ev.tx_id for ev in result.cashback_events] == ["TX1"]
+
+    def test_empty_export_returns_empty_result(self) -> None:
+        result = parse_csv(io.StringIO(""))
+        assert result.cashback_events == []
+        assert result.fx_observations == []
+
+    def test_missing_columns_raise_value_error(self) -> None:
+        with pytest.raises(ValueError, match="missing required columns: Date"):
+            parse_csv(io.StringIO("Transaction,Type\n"))
+
+
+class TestParseDate:
+    def test_parses_fixed_layout(self) -> None:
+        assert _parse_date("2025-06-15 10:02:03") == datetime(2025, 6, 15, 10, 2, 3)
+
+    def test_rejects_other_layouts(self) -> None:
+        with pytest.raises(ValueError, match="does not match format"):
+            _parse_date("2025-06-15")
+        with pytest.raises(ValueError, match="does not match format"):
+            _parse_date("2025/06/15 10:00:00")
+        with pytest.raises(ValueError, match="does not match format"):
+            _parse_date("2025-06-15 10-00-00")
+        with pytest.raises(ValueError, match="does not match format"):
+            _parse_date("2025-06-15T10:00:00")
+
+    def test_matches_strptime_outside_fixed_layout(self) -> None:
+        assert _parse_date("2025-3-01 10:00:00") == datetime(2025, 3, 1, 10, 0, 0)
+        with pytest.raises(ValueError, match="does not match format"):
+            _parse_date("2025-06-15 24:00:00")
+        with pytest.raises(ValueError, match="unconverted data remains"):
+            _parse_date("2025-06-15 10:00:00 ")
+        with pytest.raises(ValueError, match="unconverted data remains"):
+            _parse_date("2025-06-15 10:00:00.5")
+
+    def test_parse_csv_rejects_malformed_date(self) -> None:
+        source = _csv_stream([
+            "TX1,Cashback,NEXO,2.50000000,NEXO,2.50000000,$2.30,-,-,"
+            "approved / Shop,15.06.2025 10:00:00",
+        ])
+        with pytest.raises(ValueError, match="does not match format"):
+            parse_csv(source)
+
+
+class TestParseCsvFromString:
+    def test_columns_located_by_header(self) -> None:
+        """Column order follows the header, as in the sample export."""
+        content = (
+            "Type,Transaction,Date / Time (UTC),Input Currency,Input Amount,"
+            "Output Currency,Output Amount,USD Equivalent,Fee,Fee Currency,Details\n"
+            "Cashback,TX1,2024-01-15 10:30:00,NEXO,12.5,,,12.50,0,USD,Card Cashback\n"
+            "\n"
+        )
+        result = parse_csv_from_string(content)
+        assert len(result.cashback_events) == 1
+        ev = result.cashback_events[0]
+        assert ev.tx_id == "TX1"
+        assert ev.date == datetime(2024, 1, 15, 10, 30, 0)
+        assert ev.amount_nexo == Decimal("12.5")
+        assert ev.value_usd == Decimal("12.50")
+
+    def test_exchange_collateral_dispatches_like_exchange(self) -> None:
+        content = (
+            "Transaction,Type,Input Currency,Input Amount,Output Currency,"
+            "Output Amount,USD Equivalent,Fee,Fee Currency,Details,"
+            "Date / Time (UTC)\n"
+            "TX1,Exchange Collateral,BTC,-0.01,USDC,500,$500.00,0,USD,"
+            "approved / BTC to USDC,2024-03-01 12:00:00\n"
+            "TX2,Deposit To Exchange,EUR,100,EUR,100,$108.00,0,USD,"
+            "approved / Bank,2024-03-02 12:00:00\n"
+        )
+        result = parse_csv_from_string(content)
+        assert [ev.tx_id for ev in result.disposal_events] == ["TX1"]
+        assert [ev.asset for ev in result.exchange_buy_events] == ["USDC"]
+        assert result.cashback_events == []